@@ -26,6 +26,10 @@ EXCEL_ENGINE = "openpyxl"
 MAX_SOCIOS = 5
 MAX_ESTABELECIMENTOS = 5
 
+# Group Mode (matriz/filial)
+GROUP_MODE = os.getenv("GROUP_MODE", "false").lower() == "true"  # Compartilha dados da matriz entre filiais
+GROUP_LIST_SIBLINGS = os.getenv("GROUP_LIST_SIBLINGS", "false").lower() == "true"  # Lista estabelecimentos do mesmo grupo
+
 # Environment
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
 DEBUG = ENVIRONMENT == "development"
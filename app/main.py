@@ -4,6 +4,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
 import logging
 import asyncio
+import importlib
 
 from app.routes import router
 from app.config import FILES_DIR, DEBUG, LOG_LEVEL
@@ -40,6 +41,18 @@ Path(FILES_DIR).mkdir(parents=True, exist_ok=True)
 # Incluir rotas
 app.include_router(router)
 
+def preload_heavy_modules():
+    """
+    Carrega app.services (pandas, openpyxl, requests) fora do caminho de inicialização,
+    para que /health responda logo após um cold start
+    """
+    start_time = time.time()
+    try:
+        importlib.import_module("app.services")
+        logger.info(f"📦 Dependências de processamento carregadas em {time.time() - start_time:.3f}s")
+    except Exception as e:
+        logger.error(f"Erro ao pré-carregar dependências: {e}")
+
 @app.on_event("startup")
 async def startup_event():
     """Evento executado na inicialização da aplicação"""
@@ -54,6 +67,9 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Erro ao iniciar agendador de limpeza: {e}")
 
+    # Pré-carregar dependências pesadas em thread separada, sem bloquear o servidor
+    asyncio.get_running_loop().run_in_executor(None, preload_heavy_modules)
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Evento executado no encerramento da aplicação"""
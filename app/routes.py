@@ -1,9 +1,10 @@
 from fastapi import APIRouter, UploadFile, File, BackgroundTasks, HTTPException
 from fastapi.responses import FileResponse, JSONResponse
 from pathlib import Path
+import asyncio
+import importlib
 import os
 
-from app.services import process_excel_sync, start_background_process
 from app.tasks.registry import create_task_entry, get_task_status
 from app.config import MAX_FILE_SIZE_MB, FILES_DIR
 
@@ -12,6 +13,15 @@ router = APIRouter()
 # Garantir que o diretório de arquivos existe
 Path(FILES_DIR).mkdir(parents=True, exist_ok=True)
 
+async def load_services():
+    """
+    Importa app.services (pandas/openpyxl/requests) em uma thread do executor.
+    Se o preload do startup ainda estiver em andamento, a espera pelo lock de
+    import acontece nessa thread e não bloqueia o event loop (nem o /health)
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, importlib.import_module, "app.services")
+
 # === MODO 1: PROCESSAMENTO IMEDIATO (SÍNCRONO) ===
 @router.post("/upload")
 async def upload_excel(file: UploadFile = File(...)):
@@ -30,8 +40,11 @@ async def upload_excel(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="Formato de arquivo inválido. Use .xlsx ou .xls")
     
     try:
+        # Import tardio: pandas/openpyxl/requests só são carregados quando necessários
+        services = await load_services()
+
         # Processar arquivo
-        output_path = await process_excel_sync(file)
+        output_path = await services.process_excel_sync(file)
         
         return {
             "status": "success",
@@ -78,6 +91,8 @@ async def start_async_process(file: UploadFile = File(...), background_tasks: Ba
         raise HTTPException(status_code=400, detail="Formato de arquivo inválido. Use .xlsx ou .xls")
     
     try:
+        services = await load_services()
+
         # CORREÇÃO: Ler o arquivo ANTES de adicionar à tarefa background
         file_content = await file.read()
         file_name = file.filename
@@ -86,7 +101,7 @@ async def start_async_process(file: UploadFile = File(...), background_tasks: Ba
         token = create_task_entry()
         
         # Adicionar tarefa em background passando o conteúdo já lido
-        background_tasks.add_task(start_background_process, file_content, file_name, token)
+        background_tasks.add_task(services.start_background_process, file_content, file_name, token)
         
         return {
             "status": "started",
@@ -5,22 +5,27 @@ import uuid
 import json
 import io
 import logging
+from itertools import islice
 from pathlib import Path
 from typing import Optional, Dict, Any
 from fastapi import UploadFile
 
-from app.utils import sanitize_cnpj
-from app.config import API_URL, DELAY, FILES_DIR, REQUEST_TIMEOUT, MAX_RETRIES, BACKOFF_FACTOR
+from app.utils import sanitize_cnpj, cnpj_matriz
+from app.config import (
+    API_URL, DELAY, FILES_DIR, REQUEST_TIMEOUT, MAX_RETRIES, BACKOFF_FACTOR,
+    MAX_SOCIOS, MAX_ESTABELECIMENTOS, GROUP_MODE, GROUP_LIST_SIBLINGS
+)
 from app.tasks.registry import update_task
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class CNPJEnricher:
-    def __init__(self, api_url: str = API_URL, delay: float = DELAY):
+    def __init__(self, api_url: str = API_URL, delay: float = DELAY,
+                 group_mode: bool = GROUP_MODE, list_siblings: bool = GROUP_LIST_SIBLINGS):
         self.api_url = api_url
         self.delay = delay
+        self.group_mode = group_mode
+        self.list_siblings = list_siblings
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'CNPJ-Enrichment-Tool/1.0',
@@ -61,18 +66,40 @@ class CNPJEnricher:
             return None
         return None
 
-    def extract_data_from_response(self, data: Dict[Any, Any]) -> Dict[str, Any]:
+    def extract_company_data(self, data: Dict[Any, Any]) -> Dict[str, Any]:
+        """Campos da empresa (raiz), idênticos para matriz e filiais."""
         if not data:
             return {}
         comp = data.get("company", {})
-        addr = data.get("address", {})
         extracted = {
             "RazaoSocial": comp.get("name", ""),
-            "Status": data.get("status", {}).get("text", ""),
-            "DataStatus": data.get("statusDate", ""),
             "NaturezaJuridica": comp.get("nature", {}).get("text", ""),
             "Porte": comp.get("size", {}).get("text", ""),
             "CapitalSocial": comp.get("equity", ""),
+        }
+        simples = comp.get("simples", {})
+        extracted["SimplesOptante"] = "Sim" if simples.get("optant") else "Não"
+        extracted["SimplesSince"] = simples.get("since", "")
+        simei = comp.get("simei", {})
+        extracted["MEIOptante"] = "Sim" if simei.get("optant") else "Não"
+        extracted["MEISince"] = simei.get("since", "")
+        members = comp.get("members", [])
+        for i, member in enumerate(members[:MAX_SOCIOS]):
+            person = member.get("person", {})
+            extracted[f"Socio_{i+1}_Nome"] = person.get("name", "")
+            extracted[f"Socio_{i+1}_Tipo"] = person.get("type", "")
+            extracted[f"Socio_{i+1}_TaxId"] = person.get("taxId", "")
+            extracted[f"Socio_{i+1}_Role"] = member.get("role", {}).get("text", "")
+        return extracted
+
+    def extract_office_data(self, data: Dict[Any, Any]) -> Dict[str, Any]:
+        """Campos do estabelecimento (matriz ou filial)."""
+        if not data:
+            return {}
+        addr = data.get("address", {})
+        extracted = {
+            "Status": data.get("status", {}).get("text", ""),
+            "DataStatus": data.get("statusDate", ""),
             "AtividadePrincipal": data.get("mainActivity", {}).get("text", ""),
             "CNAEs": "; ".join([a.get("text", "") for a in data.get("sideActivities", [])]),
             "Telefone": "",
@@ -85,10 +112,6 @@ class CNPJEnricher:
             "Complemento": addr.get("details", ""),
             "Latitude": addr.get("latitude", ""),
             "Longitude": addr.get("longitude", ""),
-            "SimplesOptante": "",
-            "SimplesSince": "",
-            "MEIOptante": "",
-            "MEISince": "",
             "InscricoesEstaduais": ""
         }
         phones = data.get("phones", [])
@@ -97,12 +120,6 @@ class CNPJEnricher:
         emails = data.get("emails", [])
         if emails:
             extracted["Email"] = emails[0].get("address", "")
-        simples = comp.get("simples", {})
-        extracted["SimplesOptante"] = "Sim" if simples.get("optant") else "Não"
-        extracted["SimplesSince"] = simples.get("since", "")
-        simei = comp.get("simei", {})
-        extracted["MEIOptante"] = "Sim" if simei.get("optant") else "Não"
-        extracted["MEISince"] = simei.get("since", "")
         registrations = data.get("registrations", [])
         if registrations:
             ies_dict = {
@@ -111,13 +128,13 @@ class CNPJEnricher:
                 if reg.get("state") and reg.get("number")
             }
             extracted["InscricoesEstaduais"] = json.dumps(ies_dict, ensure_ascii=False)
-        members = comp.get("members", [])
-        for i, member in enumerate(members[:5]):
-            person = member.get("person", {})
-            extracted[f"Socio_{i+1}_Nome"] = person.get("name", "")
-            extracted[f"Socio_{i+1}_Tipo"] = person.get("type", "")
-            extracted[f"Socio_{i+1}_TaxId"] = person.get("taxId", "")
-            extracted[f"Socio_{i+1}_Role"] = member.get("role", {}).get("text", "")
+        return extracted
+
+    def extract_data_from_response(self, data: Dict[Any, Any]) -> Dict[str, Any]:
+        if not data:
+            return {}
+        extracted = self.extract_office_data(data)
+        extracted.update(self.extract_company_data(data))
         return extracted
 
     def setup_dataframe_columns(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -131,10 +148,12 @@ class CNPJEnricher:
             "Latitude", "Longitude", "InscricoesEstaduais",
             "TipoEstab", "CNPJ_Matriz_Provavel"
         ]
+        if self.group_mode and self.list_siblings:
+            base_cols.append("Estabelecimentos_Grupo")
         for col in base_cols:
             if col not in df.columns:
                 df[col] = ""
-        for i in range(1, 6):
+        for i in range(1, MAX_SOCIOS + 1):
             for suffix in ["Nome", "Tipo", "TaxId", "Role"]:
                 col_name = f"Socio_{i}_{suffix}"
                 if col_name not in df.columns:
@@ -146,20 +165,74 @@ class CNPJEnricher:
         total_rows = len(df)
         processed_count = 0
         success_count = 0
-        logger.info(f"Iniciando enriquecimento de {total_rows} CNPJs")
-        for idx, row in df.iterrows():
+        # Modo grupo: respostas bem-sucedidas por CNPJ (falhas não são guardadas, para
+        # que a linha seja consultada de novo), campos de empresa e matriz verificada por raiz
+        response_cache: Dict[str, Dict[Any, Any]] = {}
+        company_cache: Dict[str, Dict[str, Any]] = {}
+        matriz_verificada: Dict[str, str] = {}
+        # Linhas cujos dados de empresa vieram de uma filial, reescritas se a matriz aparecer
+        fallback_rows: Dict[str, list] = {}
+        api_calls = 0
+        logger.info(f"Iniciando enriquecimento de {total_rows} CNPJs (modo grupo: {self.group_mode})")
+        for position, (idx, row) in enumerate(df.iterrows(), start=1):
             try:
                 cnpj = row["CNPJ_Sanitizado"]
                 if not cnpj or len(cnpj) != 14 or not cnpj.isdigit():
-                    logger.warning(f"CNPJ inválido na linha {idx + 1}: {cnpj}")
+                    logger.warning(f"CNPJ inválido na linha {position}: {cnpj}")
                     processed_count += 1
                     continue
                 if token:
                     progress = int((processed_count / total_rows) * 100)
                     update_task(token, progress=progress)
-                data = self.fetch_cnpj_data(cnpj)
+                if cnpj in response_cache:
+                    data = response_cache[cnpj]
+                    fetched = False
+                else:
+                    data = self.fetch_cnpj_data(cnpj)
+                    api_calls += 1
+                    fetched = True
+                    if self.group_mode and data:
+                        response_cache[cnpj] = data
                 if data:
-                    extracted_data = self.extract_data_from_response(data)
+                    if self.group_mode:
+                        raiz = cnpj[:8]
+                        if data.get("head", cnpj[8:12] == "0001"):
+                            # A própria matriz sempre define (e corrige) os dados da raiz
+                            matriz_verificada[raiz] = cnpj
+                            if raiz not in company_cache or raiz in fallback_rows:
+                                company_cache[raiz] = self.extract_company_data(data)
+                                pendentes = fallback_rows.pop(raiz, [])
+                                for fallback_idx in pendentes:
+                                    for key, value in company_cache[raiz].items():
+                                        if key in df.columns:
+                                            df.at[fallback_idx, key] = value
+                                if pendentes:
+                                    logger.info(f"Dados da empresa de {len(pendentes)} filial(is) atualizados com a matriz {cnpj}")
+                        elif raiz not in company_cache:
+                            cnpj_hq = cnpj_matriz(raiz)
+                            hq_data = response_cache.get(cnpj_hq)
+                            if hq_data is None:
+                                time.sleep(self.delay)
+                                hq_data = self.fetch_cnpj_data(cnpj_hq)
+                                api_calls += 1
+                                if hq_data:
+                                    response_cache[cnpj_hq] = hq_data
+                            if hq_data and hq_data.get("head", True):
+                                matriz_verificada[raiz] = cnpj_hq
+                                company_cache[raiz] = self.extract_company_data(hq_data)
+                            else:
+                                logger.warning(
+                                    f"Matriz {cnpj_hq} não confirmada; dados da empresa da raiz {raiz} "
+                                    f"obtidos da filial {cnpj}"
+                                )
+                                company_cache[raiz] = self.extract_company_data(data)
+                                fallback_rows[raiz] = []
+                        if raiz in fallback_rows:
+                            fallback_rows[raiz].append(idx)
+                        extracted_data = self.extract_office_data(data)
+                        extracted_data.update(company_cache[raiz])
+                    else:
+                        extracted_data = self.extract_data_from_response(data)
                     for key, value in extracted_data.items():
                         if key in df.columns:
                             df.at[idx, key] = value
@@ -168,33 +241,51 @@ class CNPJEnricher:
                 else:
                     logger.warning(f"Dados não encontrados para CNPJ {cnpj}")
                 processed_count += 1
-                if processed_count < total_rows:
+                if fetched and processed_count < total_rows:
                     time.sleep(self.delay)
             except Exception as e:
-                logger.error(f"Erro ao processar linha {idx + 1}: {e}")
+                logger.error(f"Erro ao processar linha {position}: {e}")
                 processed_count += 1
                 continue
 
-        # Identificação de matriz e filial
+        # Identificação de matriz e filial (dict preserva a ordem e deduplica em O(1))
         cnpjs_sanitizados = df["CNPJ_Sanitizado"]
-        raiz_map = {}
+        raiz_map: Dict[str, Dict[str, None]] = {}
         for cnpj in cnpjs_sanitizados:
-            raiz = cnpj[:8]
-            if raiz not in raiz_map:
-                raiz_map[raiz] = []
-            raiz_map[raiz].append(cnpj)
+            raiz_map.setdefault(cnpj[:8], {})[cnpj] = None
 
-        for idx, cnpj in enumerate(cnpjs_sanitizados):
+        # Matriz e primeiros estabelecimentos calculados uma vez por raiz
+        matriz_map = {}
+        grupo_map = {}
+        for raiz, cnpjs in raiz_map.items():
+            matriz_map[raiz] = next((c for c in cnpjs if c[8:12] == "0001"), None) or cnpj_matriz(raiz)
+            grupo_map[raiz] = list(islice(cnpjs, MAX_ESTABELECIMENTOS + 1))
+
+        # items() devolve o rótulo do índice, que pode ter lacunas após o dropna da leitura
+        for idx, cnpj in cnpjs_sanitizados.items():
             raiz = cnpj[:8]
-            sufixo = cnpj[8:12]
-            if sufixo == "0001":
+            if self.group_mode:
+                # Só a matriz confirmada pela API é informada; sem confirmação, a coluna fica vazia
+                cnpj_hq = matriz_verificada.get(raiz, "")
+                eh_matriz = cnpj == cnpj_hq if cnpj_hq else cnpj[8:12] == "0001"
+            else:
+                cnpj_hq = matriz_map[raiz]
+                eh_matriz = cnpj[8:12] == "0001"
+            if eh_matriz:
                 df.at[idx, "TipoEstab"] = "Matriz"
                 df.at[idx, "CNPJ_Matriz_Provavel"] = ""
             else:
                 df.at[idx, "TipoEstab"] = "Filial"
-                cnpj_matriz = next((c for c in raiz_map.get(raiz, []) if c[8:12] == "0001"), f"{raiz}0001")
-                df.at[idx, "CNPJ_Matriz_Provavel"] = cnpj_matriz
+                df.at[idx, "CNPJ_Matriz_Provavel"] = cnpj_hq
+            if self.group_mode and self.list_siblings:
+                irmaos = [c for c in grupo_map[raiz] if c != cnpj]
+                df.at[idx, "Estabelecimentos_Grupo"] = "; ".join(irmaos[:MAX_ESTABELECIMENTOS])
 
+        if self.group_mode:
+            logger.info(
+                f"Modo grupo: {len(company_cache)} raízes, {len(matriz_verificada)} matrizes confirmadas, "
+                f"{api_calls} consultas à API"
+            )
         logger.info(f"Enriquecimento concluído: {success_count}/{total_rows} CNPJs processados com sucesso")
         return df
 
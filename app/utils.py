@@ -3,3 +3,11 @@ def sanitize_cnpj(cnpj: str) -> str:
     import re
     digits = re.sub(r'\D', '', str(cnpj))
     return digits.zfill(14)[:14]
+
+def cnpj_matriz(raiz: str) -> str:
+    """Monta o CNPJ completo da matriz (ordem 0001) a partir da raiz de 8 dígitos."""
+    base = f"{raiz}0001"
+    for pesos in ([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]):
+        resto = sum(int(d) * p for d, p in zip(base, pesos)) % 11
+        base += str(0 if resto < 2 else 11 - resto)
+    return base
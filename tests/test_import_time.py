@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# Orçamento para "import app.main" (cold start no Render). Com imports tardios leva
+# ~300 ms; carregar pandas/openpyxl/requests na importação passa de ~550 ms
+IMPORT_TIME_BUDGET_MS = int(os.getenv("IMPORT_TIME_BUDGET_MS", "450"))
+
+
+def run_python(tmp_path, *args):
+    # cwd temporário: app.main cria FILES_DIR relativo ao diretório atual
+    env = {**os.environ, "PYTHONPATH": str(ROOT_DIR)}
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=tmp_path, env=env, capture_output=True, text=True, check=True
+    )
+
+
+def test_import_app_main_dentro_do_orcamento(tmp_path):
+    result = run_python(tmp_path, "-X", "importtime", "-c", "import app.main")
+
+    cumulative_us = None
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, module = line.split("|")
+        if module.strip() == "app.main":
+            cumulative_us = int(cumulative)
+
+    assert cumulative_us is not None, "linha de app.main não encontrada na saída de -X importtime"
+    assert cumulative_us / 1000 <= IMPORT_TIME_BUDGET_MS, (
+        f"import app.main levou {cumulative_us / 1000:.0f}ms (orçamento: {IMPORT_TIME_BUDGET_MS}ms)"
+    )
+
+
+def test_import_app_main_nao_carrega_dependencias_pesadas(tmp_path):
+    code = (
+        "import sys, app.main; "
+        "print(','.join(m for m in ('pandas', 'openpyxl', 'requests') if m in sys.modules))"
+    )
+    result = run_python(tmp_path, "-c", code)
+
+    assert result.stdout.strip() == ""
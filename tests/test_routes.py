@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+def test_health_responde_sem_carregar_services(tmp_path):
+    # Interpretador novo: outros testes já importam app.services neste processo
+    code = (
+        "import sys\n"
+        "from fastapi.testclient import TestClient\n"
+        "from app.main import app\n"
+        "response = TestClient(app).get('/health')\n"
+        "print(response.status_code, 'app.services' in sys.modules)\n"
+    )
+    env = {**os.environ, "PYTHONPATH": str(ROOT_DIR)}
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=tmp_path, env=env, capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.split() == ["200", "False"]
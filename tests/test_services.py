@@ -0,0 +1,131 @@
+import logging
+
+import pandas as pd
+
+from app.services import CNPJEnricher
+
+MATRIZ = "11222333000181"
+FILIAL_A = "11222333000262"
+FILIAL_B = "11222333000343"
+
+
+def make_response(cnpj, heads=None):
+    return {
+        "head": cnpj in heads if heads is not None else cnpj[8:12] == "0001",
+        "company": {
+            "name": f"ACME {cnpj[8:12]}",
+            "members": [{"person": {"name": f"Socio {cnpj[8:12]}"}}],
+        },
+        "address": {"city": f"Cidade {cnpj[8:12]}"},
+    }
+
+
+def make_enricher(fail_first=(), not_found=(), heads=None, **kwargs):
+    enricher = CNPJEnricher(delay=0, **kwargs)
+    calls = []
+    pending_failures = set(fail_first)
+
+    def fake_fetch(cnpj):
+        calls.append(cnpj)
+        if cnpj in pending_failures:
+            pending_failures.discard(cnpj)
+            return None
+        if cnpj in not_found:
+            return None
+        return make_response(cnpj, heads)
+
+    enricher.fetch_cnpj_data = fake_fetch
+    return enricher, calls
+
+
+def test_matriz_filial_usa_rotulo_do_indice_apos_dropna():
+    enricher, _ = make_enricher()
+    df = pd.DataFrame({"CNPJ": [FILIAL_A, None, MATRIZ]}).dropna(subset=["CNPJ"])
+
+    result = enricher.enrich_dataframe(df)
+
+    assert list(result.index) == [0, 2]
+    assert result.at[0, "TipoEstab"] == "Filial"
+    assert result.at[0, "CNPJ_Matriz_Provavel"] == MATRIZ
+    assert result.at[2, "TipoEstab"] == "Matriz"
+    assert result.at[2, "CNPJ_Matriz_Provavel"] == ""
+
+
+def test_filial_sem_matriz_na_planilha_aponta_cnpj_completo():
+    enricher, _ = make_enricher()
+    result = enricher.enrich_dataframe(pd.DataFrame({"CNPJ": [FILIAL_A]}))
+
+    assert result.at[0, "CNPJ_Matriz_Provavel"] == MATRIZ
+
+
+def test_modo_grupo_busca_matriz_uma_vez_e_compartilha_dados_da_empresa():
+    enricher, calls = make_enricher(group_mode=True)
+    df = pd.DataFrame({"CNPJ": [FILIAL_A, FILIAL_B, MATRIZ, FILIAL_A]})
+
+    result = enricher.enrich_dataframe(df)
+
+    assert calls == [FILIAL_A, MATRIZ, FILIAL_B]
+    assert set(result["RazaoSocial"]) == {"ACME 0001"}
+    assert set(result["Socio_1_Nome"]) == {"Socio 0001"}
+    assert result.at[1, "Municipio"] == "Cidade 0003"
+
+
+def test_modo_grupo_refaz_consulta_da_matriz_que_falhou(caplog):
+    enricher, calls = make_enricher(fail_first={MATRIZ}, group_mode=True)
+    df = pd.DataFrame({"CNPJ": [FILIAL_A, MATRIZ, FILIAL_B]})
+
+    with caplog.at_level(logging.WARNING, logger="app.services"):
+        result = enricher.enrich_dataframe(df)
+
+    assert calls == [FILIAL_A, MATRIZ, MATRIZ, FILIAL_B]
+    assert "obtidos da filial" in caplog.text
+    # A filial processada antes da matriz é reescrita quando a matriz chega
+    assert set(result["RazaoSocial"]) == {"ACME 0001"}
+    assert set(result["Socio_1_Nome"]) == {"Socio 0001"}
+    assert result.at[0, "Municipio"] == "Cidade 0002"
+    assert result.at[1, "Municipio"] == "Cidade 0001"
+    assert list(result["CNPJ_Matriz_Provavel"]) == [MATRIZ, "", MATRIZ]
+
+
+def test_modo_grupo_usa_matriz_confirmada_pela_api():
+    # Matriz com ordem diferente de 0001, informada pelo campo "head"
+    enricher, calls = make_enricher(heads={FILIAL_B}, group_mode=True)
+    df = pd.DataFrame({"CNPJ": [FILIAL_B, FILIAL_A]})
+
+    result = enricher.enrich_dataframe(df)
+
+    assert calls == [FILIAL_B, FILIAL_A]
+    assert list(result["TipoEstab"]) == ["Matriz", "Filial"]
+    assert list(result["CNPJ_Matriz_Provavel"]) == ["", FILIAL_B]
+    assert set(result["RazaoSocial"]) == {"ACME 0003"}
+
+
+def test_modo_grupo_deixa_matriz_vazia_sem_confirmacao(caplog):
+    enricher, calls = make_enricher(not_found={MATRIZ}, group_mode=True)
+    df = pd.DataFrame({"CNPJ": [FILIAL_A, FILIAL_B]})
+
+    with caplog.at_level(logging.WARNING, logger="app.services"):
+        result = enricher.enrich_dataframe(df)
+
+    assert calls == [FILIAL_A, MATRIZ, FILIAL_B]
+    assert "não confirmada" in caplog.text
+    assert list(result["TipoEstab"]) == ["Filial", "Filial"]
+    assert list(result["CNPJ_Matriz_Provavel"]) == ["", ""]
+
+
+def test_modo_grupo_nao_confirma_matriz_com_head_falso():
+    enricher, _ = make_enricher(heads=set(), group_mode=True)
+    result = enricher.enrich_dataframe(pd.DataFrame({"CNPJ": [FILIAL_A]}))
+
+    assert result.at[0, "CNPJ_Matriz_Provavel"] == ""
+
+
+def test_modo_grupo_lista_estabelecimentos_da_mesma_raiz():
+    enricher, _ = make_enricher(group_mode=True, list_siblings=True)
+    df = pd.DataFrame({"CNPJ": [FILIAL_A, MATRIZ, FILIAL_A]})
+
+    result = enricher.enrich_dataframe(df)
+
+    assert result.at[0, "Estabelecimentos_Grupo"] == MATRIZ
+    assert result.at[1, "Estabelecimentos_Grupo"] == FILIAL_A
+    assert result.at[2, "Estabelecimentos_Grupo"] == MATRIZ
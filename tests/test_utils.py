@@ -0,0 +1,20 @@
+import pytest
+
+from app.utils import sanitize_cnpj, cnpj_matriz
+
+
+def test_sanitize_cnpj_remove_mascara():
+    assert sanitize_cnpj("11.222.333/0001-81") == "11222333000181"
+
+
+def test_sanitize_cnpj_completa_zeros_a_esquerda():
+    assert sanitize_cnpj("191") == "00000000000191"
+
+
+@pytest.mark.parametrize("raiz, esperado", [
+    ("11222333", "11222333000181"),
+    ("33000167", "33000167000101"),
+    ("00000000", "00000000000191"),
+])
+def test_cnpj_matriz_calcula_digitos_verificadores(raiz, esperado):
+    assert cnpj_matriz(raiz) == esperado